@@ -4,10 +4,32 @@ Extracts English subtitles from MKV files, preferring the least polluted ones.
 """
 
 import argparse
+import atexit
+import json
+import os
 import subprocess
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Common language variations of English
+ENGLISH_LANGS = frozenset(
+    {"en", "eng", "english", "en-us", "en_us", "enus", "en-gb", "en_gb", "engb"}
+)
+
+# Title fragments marking closed captions and hearing-impaired subtitles
+CC_TITLE_TAGS = ("cc", "caption")
+HI_TITLE_TAGS = ("sdh", "hi", "hearing", "impaired")
+
+# Persistent ffprobe results, keyed by "<path>:<mtime_ns>:<size>"
+PROBE_CACHE_FILE = Path("~/.cache/mkv-lab/ffprobe.json").expanduser()
+
+_probe_cache = {}
+_probe_cache_dirty = False
+_probe_cache_lock = threading.Lock()
+
 
 def parse_arguments():
     """Parses command line arguments"""
@@ -18,6 +40,7 @@ def parse_arguments():
 Examples:
   %(prog)s ./videos
   %(prog)s ./videos ./subtitles
+  %(prog)s --jobs 4 ./videos ./subtitles
         """,
     )
 
@@ -27,12 +50,134 @@ Examples:
         "output_dir", nargs="?", help="Output directory for SRT files (optional)"
     )
 
+    # Parallelism
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Maximum number of files processed concurrently (default: %(default)s)",
+    )
+
     args = parser.parse_args()
 
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     # Set output directory (if not provided, use the same as input)
     output_dir = Path(args.output_dir) if args.output_dir else Path(args.input_dir)
 
-    return Path(args.input_dir), output_dir
+    return Path(args.input_dir), output_dir, args.jobs
+
+
+def load_probe_cache():
+    """Loads the persistent ffprobe cache, starting empty if it is unusable"""
+    global _probe_cache
+    try:
+        with open(PROBE_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if isinstance(cache, dict):
+            _probe_cache = cache
+    except (OSError, ValueError):
+        pass
+
+
+def _probe_cache_key(path, stat):
+    """Returns the ffprobe cache key of a file"""
+    return f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _is_current_probe_cache_key(key):
+    """Checks whether a cache key still matches its file on disk"""
+    path = key.rsplit(":", 2)[0]
+    try:
+        return _probe_cache_key(path, os.stat(path)) == key
+    except (OSError, ValueError):
+        return False
+
+
+def save_probe_cache():
+    """
+    Writes the ffprobe cache back to disk if new entries were added, dropping
+    entries of files that were deleted, moved or modified since
+    """
+    with _probe_cache_lock:
+        if not _probe_cache_dirty:
+            return
+        cache = {
+            key: streams
+            for key, streams in _probe_cache.items()
+            if _is_current_probe_cache_key(key)
+        }
+        temp_file = None
+        try:
+            PROBE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            # A unique temporary name, so concurrent runs don't clobber each
+            # other's file before the rename
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=PROBE_CACHE_FILE.parent,
+                prefix=f"{PROBE_CACHE_FILE.name}.",
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                temp_file = f.name
+                json.dump(cache, f)
+            os.replace(temp_file, PROBE_CACHE_FILE)
+        except OSError as e:
+            if temp_file and os.path.exists(temp_file):
+                os.unlink(temp_file)
+            print(f"Warning: could not save ffprobe cache: {e}")
+
+
+def probe_subtitle_streams(input_file):
+    """
+    Returns the ffprobe description of the subtitle streams of a file.
+
+    Results are cached by path, modification time and size, so unchanged files
+    are not probed again on later runs. The raw streams are cached rather than
+    the selected index, so the selection heuristic can change freely.
+    """
+    global _probe_cache_dirty
+
+    key = _probe_cache_key(input_file, os.stat(input_file))
+
+    with _probe_cache_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        # Languages, titles and dispositions come from the container header,
+        # so reading is capped at 1 MB and stream analysis at 0.1 s (0 would
+        # mean the default of about 5 s)
+        "-probesize",
+        "1M",
+        "-analyzeduration",
+        "100000",
+        "-print_format",
+        "json",
+        "-show_entries",
+        "stream=index:stream_tags=language,title",
+        "-show_entries",
+        "stream_disposition=forced,hearing_impaired",
+        "-select_streams",
+        "s",
+        input_file,
+    ]
+
+    # json.loads decodes the UTF-8 bytes itself, no text mode needed
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    streams = json.loads(result.stdout).get("streams", [])
+
+    with _probe_cache_lock:
+        _probe_cache[key] = streams
+        _probe_cache_dirty = True
+
+    return streams
 
 
 def find_complete_english_subtitle(input_file):
@@ -49,159 +194,93 @@ def find_complete_english_subtitle(input_file):
     Completely ignores forced subtitles
     """
     try:
-        cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "stream=index:stream_tags=language,title",
-            "-show_entries",
-            "stream_disposition=forced,hearing_impaired",
-            "-select_streams",
-            "s",
-            input_file,
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
+        streams = probe_subtitle_streams(input_file)
 
         subtitle_candidates = []  # List of (index, type, title)
 
-        current_index = None
-        current_lang = None
-        current_title = None
-        current_forced = False
-        current_hearing_impaired = False
-
-        # Map common language variations
-        lang_variations = {
-            "en": [
-                "en",
-                "eng",
-                "english",
-                "en-us",
-                "en_us",
-                "enus",
-                "en-gb",
-                "en_gb",
-                "engb",
-            ]
-        }
-
-        lines = output.split("\n")
-        for line in lines:
-            line = line.strip().lower()
-
-            if line.startswith("[stream]"):
-                # Reset for new stream
-                current_index = None
-                current_lang = None
-                current_title = None
-                current_forced = False
-                current_hearing_impaired = False
-
-            elif line.startswith("[/stream]"):
-                # Process complete stream - IGNORE forced subtitles
-                if (
-                    current_lang
-                    and any(
-                        current_lang in lang_variations.get("en", [])
-                        for current_lang in [current_lang]
-                    )
-                    and not current_forced
-                ):
-
-                    # Determine subtitle type based on tags and dispositions
-                    subtitle_type = "normal"
-
-                    # Check if special by title
-                    title_special = False
-                    special_tags = []
-                    if current_title:
-                        title_lower = current_title.lower()
-
-                        # Ignore forced subtitles by title as well
-                        if "forced" in title_lower:
-                            continue  # Skip forced subtitles
-                        if any(tag in title_lower for tag in ["cc", "caption"]):
-                            subtitle_type = "cc"
-                            special_tags.append("cc")
-                        if any(
-                            tag in title_lower
-                            for tag in ["sdh", "hi", "hearing", "impaired"]
-                        ):
-                            subtitle_type = "hi"
-                            special_tags.append("hi")
-
-                        # Mark as special if there are relevant tags
-                        title_special = bool(special_tags)
-
-                    # Check dispositions (already ensured not forced above)
-                    if current_hearing_impaired and subtitle_type == "normal":
-                        subtitle_type = "hi"
-                        special_tags.append("hi")
-
-                    # Add to candidate list
-                    subtitle_candidates.append(
-                        {
-                            "index": current_index,
-                            "type": subtitle_type,
-                            "title": current_title,
-                            "special_tags": special_tags,
-                            "hearing_impaired": current_hearing_impaired,
-                            "title_special": title_special,
-                        }
-                    )
-
-            elif line.startswith("index="):
-                current_index = line.split("=")[1]
-            elif line.startswith("tag:language="):
-                current_lang = line.split("=")[1].strip()
-            elif line.startswith("tag:title="):
-                current_title = line.split("=")[1].strip()
-            elif line.startswith("disposition:forced="):
-                current_forced = line.split("=")[1].strip() == "1"
-            elif line.startswith("disposition:hearing_impaired="):
-                current_hearing_impaired = line.split("=")[1].strip() == "1"
+        for stream in streams:
+            tags = stream.get("tags", {})
+            disposition = stream.get("disposition", {})
+
+            # IGNORE forced and non-English subtitles
+            if disposition.get("forced") == 1:
+                continue
+            if tags.get("language", "").strip().lower() not in ENGLISH_LANGS:
+                continue
+
+            title = tags.get("title", "").strip().lower()
+            hearing_impaired = disposition.get("hearing_impaired") == 1
+
+            # Determine subtitle type based on tags and dispositions
+            subtitle_type = "normal"
+
+            # Check if special by title
+            title_special = False
+            special_tags = []
+            if title:
+                # Ignore forced subtitles by title as well
+                if "forced" in title:
+                    continue  # Skip forced subtitles
+                if any(tag in title for tag in CC_TITLE_TAGS):
+                    subtitle_type = "cc"
+                    special_tags.append("cc")
+                if any(tag in title for tag in HI_TITLE_TAGS):
+                    subtitle_type = "hi"
+                    special_tags.append("hi")
+
+                # Mark as special if there are relevant tags
+                title_special = bool(special_tags)
+
+            # Check dispositions (already ensured not forced above)
+            if hearing_impaired and subtitle_type == "normal":
+                subtitle_type = "hi"
+                special_tags.append("hi")
+
+            # Add to candidate list
+            subtitle_candidates.append(
+                {
+                    "index": str(stream["index"]),
+                    "type": subtitle_type,
+                    "title": title or None,
+                    "special_tags": special_tags,
+                    "hearing_impaired": hearing_impaired,
+                    "title_special": title_special,
+                }
+            )
 
         # Preference order: normal > hi > cc > title_special
         type_priority = {"normal": 0, "hi": 1, "cc": 2, "title_special": 3}
 
-        # Find the best subtitle based on priority
-        best_subtitle = None
-        for candidate in subtitle_candidates:
+        def rank(candidate):
             candidate_type = candidate["type"]
             if candidate["title_special"] and candidate_type == "normal":
                 candidate_type = "title_special"
+            return type_priority[candidate_type]
 
-            if (
-                best_subtitle is None
-                or type_priority[candidate_type] < type_priority[best_subtitle["type"]]
-            ):
-                best_subtitle = candidate
+        # Find the best subtitle based on priority (first one wins on ties)
+        best_subtitle = min(subtitle_candidates, key=rank, default=None)
 
         return best_subtitle["index"] if best_subtitle else None
 
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, ValueError, OSError):
         return None
 
 
-def extract_subtitle(input_file, output_file, subtitle_index, file_index):
-    """Extracts the subtitle to SRT file"""
-    input_path = Path(input_file)
-    file_name = input_path.name
-
+def extract_subtitle(input_file, output_file, subtitle_index):
+    """Extracts the subtitle to SRT file, returning the status to report"""
     try:
         # Build ffmpeg command
         ffmpeg_cmd = [
             "ffmpeg",
+            # Runs alongside other ffmpeg processes, so keep it off the terminal
+            "-nostdin",
             "-i",
             input_file,
             "-map",
             f"0:{subtitle_index}",
             "-c",
             "srt",
-            str(output_file),
+            os.fspath(output_file),
         ]
 
         # Run conversion
@@ -209,19 +288,32 @@ def extract_subtitle(input_file, output_file, subtitle_index, file_index):
             ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
         )
 
-        print(f"{file_index}. {file_name} [OK]")
-        return True
+        return "OK"
 
     except subprocess.CalledProcessError:
-        print(f"{file_index}. {file_name} [FAIL: ffmpeg error]")
         if output_file.exists():
             output_file.unlink()
-        return False
-    except OSError as e:
-        print(f"{file_index}. {file_name} [FAIL: file error]")
+        return "FAIL: ffmpeg error"
+    except OSError:
         if output_file.exists():
             output_file.unlink()
-        return False
+        return "FAIL: file error"
+
+
+def process_one(mkv_file, output_dir):
+    """Finds and extracts the best English subtitle of a single MKV file"""
+    # Set output file with same name but .srt extension
+    output_file = output_dir / f"{mkv_file.stem}.srt"
+
+    mkv_path = os.fspath(mkv_file)
+
+    # Find the best complete English subtitle (not forced)
+    subtitle_index = find_complete_english_subtitle(mkv_path)
+
+    if not subtitle_index:
+        return "FAIL: no suitable English subtitle found"
+
+    return extract_subtitle(mkv_path, output_file, subtitle_index)
 
 
 def main():
@@ -245,7 +337,7 @@ def main():
         sys.exit(1)
 
     # Parse arguments
-    input_dir, output_dir = parse_arguments()
+    input_dir, output_dir, jobs = parse_arguments()
 
     if not input_dir.is_dir():
         print(f"Error: Input directory not found: {input_dir}")
@@ -254,6 +346,10 @@ def main():
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    # Reuse ffprobe results from previous runs
+    load_probe_cache()
+    atexit.register(save_probe_cache)
+
     # Process files
     mkv_files = sorted(input_dir.glob("*.mkv"))
 
@@ -263,20 +359,19 @@ def main():
 
     print(f"Processing {len(mkv_files)} MKV file(s)...")
 
+    # Files are independent and the work is spent waiting on ffprobe/ffmpeg,
+    # so a bounded thread pool keeps at most `jobs` subprocess pairs running.
+    # Results are reported in file order, so the output is deterministic.
     success_count = 0
-    for i, mkv_file in enumerate(mkv_files, 1):
-        # Find the best complete English subtitle (not forced)
-        subtitle_index = find_complete_english_subtitle(str(mkv_file))
-
-        if not subtitle_index:
-            print(f"{i}. {mkv_file.name} [FAIL: no suitable English subtitle found]")
-            continue
-
-        # Set output file with same name but .srt extension
-        output_file = output_dir / f"{mkv_file.stem}.srt"
-
-        if extract_subtitle(str(mkv_file), output_file, subtitle_index, i):
-            success_count += 1
+    with ThreadPoolExecutor(max_workers=min(jobs, len(mkv_files))) as executor:
+        futures = [
+            executor.submit(process_one, mkv_file, output_dir) for mkv_file in mkv_files
+        ]
+        for i, (mkv_file, future) in enumerate(zip(mkv_files, futures), 1):
+            status = future.result()
+            print(f"{i}. {mkv_file.name} [{status}]")
+            if status == "OK":
+                success_count += 1
 
     print(f"Processing complete! {success_count}/{len(mkv_files)} file(s) processed.")
 
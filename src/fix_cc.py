@@ -3,14 +3,17 @@
 Interactively cleans CC/SDH elements from SRT subtitles.
 """
 
-import copy
 import re
 import sys
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from enum import auto as enum_auto
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
+from typing import Callable, FrozenSet, Iterator, List, Optional, Tuple
+
+# Dash characters that can open a dialogue line
+DASHES = ("-", "–", "—")
 
 
 class PatternMode(Enum):
@@ -26,42 +29,69 @@ class Pattern:
 
     regex: re.Pattern
     mode: PatternMode
+    # Bound methods of the compiled regex, exposed directly so that matching
+    # doesn't go through an extra Python-level call
+    search: Callable[[str], Optional[re.Match[str]]] = field(
+        init=False, repr=False, compare=False
+    )
+    sub: Callable[..., str] = field(init=False, repr=False, compare=False)
+    match: Callable[[str], Optional[re.Match[str]]] = field(
+        init=False, repr=False, compare=False
+    )
+    finditer: Callable[[str], Iterator[re.Match[str]]] = field(
+        init=False, repr=False, compare=False
+    )
 
-    def search(self, string: str) -> Optional[re.Match[str]]:
-        return self.regex.search(string)
-
-    def sub(self, repl: str, string: str, count: int = 0) -> str:
-        return self.regex.sub(repl, string, count)
-
-    def match(self, string: str) -> Optional[re.Match[str]]:
-        return self.regex.match(string)
+    def __post_init__(self):
+        self.search = self.regex.search
+        self.sub = self.regex.sub
+        self.match = self.regex.match
+        self.finditer = self.regex.finditer
 
 
 class Patterns:
     """Padrões nomeados usados pela aplicação, cada um associado ao seu modo de processamento."""
 
-    PARENTHESES = Pattern(re.compile(r"\([^)]*\)"), PatternMode.INTERACTIVE)
-    BRACKETS = Pattern(re.compile(r"\[[^\]]*\]"), PatternMode.INTERACTIVE)
-    CURLY_BRACKETS = Pattern(re.compile(r"\{[^}]*\}"), PatternMode.INTERACTIVE)
-    HASH = Pattern(re.compile(r"#[^#]*#"), PatternMode.INTERACTIVE)
+    # Quantifiers followed by something they can't match are possessive (*+),
+    # so a failed match is given up at once instead of backtracking
+    PARENTHESES = Pattern(re.compile(r"\([^)]*+\)"), PatternMode.INTERACTIVE)
+    BRACKETS = Pattern(re.compile(r"\[[^\]]*+\]"), PatternMode.INTERACTIVE)
+    CURLY_BRACKETS = Pattern(re.compile(r"\{[^}]*+\}"), PatternMode.INTERACTIVE)
+    HASH = Pattern(re.compile(r"#[^#]*+#"), PatternMode.INTERACTIVE)
     MUSIC_SIGN = Pattern(re.compile(r"♪"), PatternMode.INTERACTIVE)
+    # All of the above in a single alternation, so the text is scanned only once
+    SPECIAL_CONTENT = Pattern(
+        re.compile(
+            "|".join(
+                p.regex.pattern
+                for p in (PARENTHESES, BRACKETS, CURLY_BRACKETS, HASH, MUSIC_SIGN)
+            )
+        ),
+        PatternMode.INTERACTIVE,
+    )
+    # Anything the INTERACTIVE steps would act on: delimited content, music
+    # signs, a colon (possible speaker), double hyphens or a leading dash
+    CC_MARKERS = Pattern(
+        re.compile(r"[()\[\]{}#♪:]|--|^\s*+[\-\–\—]", re.MULTILINE),
+        PatternMode.INTERACTIVE,
+    )
     DOUBLE_HYPHENS = Pattern(re.compile(r"--"), PatternMode.INTERACTIVE)
     LENGTHY_ELLIPSIS = Pattern(re.compile(r"\.{4,}"), PatternMode.AUTO)
-    SPEAKER = Pattern(
-        re.compile(r"^\s*([^:\n]+?)\s*:", re.IGNORECASE), PatternMode.INTERACTIVE
-    )
-    LEADING_DASHES = Pattern(re.compile(r"^[\-\–\—]"), PatternMode.INTERACTIVE)
-    MULTIPLE_SPACES = Pattern(re.compile(r"\s+"), PatternMode.INTERACTIVE)
-    SPACES_BEFORE_PUNCTUATION = Pattern(
-        re.compile(r"\s+([.,!?;:])"), PatternMode.INTERACTIVE
+    # SRT cue: number line, "start --> end" line, then text up to a blank line
+    SRT_BLOCK = Pattern(
+        re.compile(
+            r"^[ \t]*+(\d++)[ \t]*+\n(.*?)-->(.*?)\n((?:[^\S\n]*+\S.*+(?:\n|\Z))+)",
+            re.MULTILINE,
+        ),
+        PatternMode.AUTO,
     )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SubtitleStructure:
     """Analyzed structure of a subtitle."""
 
-    speakers: Set[str] = field(default_factory=set)
+    speakers: FrozenSet[str] = frozenset()
     has_dashes: bool = False
     has_parentheses: bool = False
     has_brackets: bool = False
@@ -81,7 +111,7 @@ class SubtitleStructure:
         return self.speaker_count > 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Subtitle:
     """Complete representation of a subtitle."""
 
@@ -91,46 +121,60 @@ class Subtitle:
     text: str
     original_text: str = ""
     lines: List[str] = field(default_factory=list)
-    structure: SubtitleStructure = field(default_factory=SubtitleStructure)
+    # Analyzed from the text unless an already analyzed structure is given
+    structure: Optional[SubtitleStructure] = None
 
     def __post_init__(self):
         if not self.lines:
             self.lines = self.text.split("\n")
         if not self.original_text:
             self.original_text = self.text
-        # Analyze the structure of the subtitle
-        self._analyze_structure()
-
-    def _analyze_structure(self):
+        if self.structure is None:
+            # Analyze the structure of the subtitle
+            self.structure = Subtitle._analyze_structure(self.text, tuple(self.lines))
+
+    def with_text(self, text: str) -> "Subtitle":
+        """Returns a copy with new text, keeping the structure of the original."""
+        # Passing the structure along skips re-analysis; it is frozen, so
+        # sharing it is safe
+        return replace(self, text=text, lines=text.split("\n"))
+
+    # Identical cues ("♪", "Thanks.", credits repeated across episodes) share
+    # one analyzed structure, which is safe because structures are frozen
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _analyze_structure(text: str, lines: Tuple[str, ...]) -> SubtitleStructure:
         """Analyzes the structure of the subtitle for decision making."""
-        self.structure.line_count = len(self.lines)
-
-        # Checks content patterns on the full text (multiline-aware)
-        if Patterns.PARENTHESES.search(self.text):
-            self.structure.has_parentheses = True
-        if Patterns.BRACKETS.search(self.text):
-            self.structure.has_brackets = True
-        if Patterns.CURLY_BRACKETS.search(self.text):
-            self.structure.has_curly_brackets = True
-        if Patterns.HASH.search(self.text):
-            self.structure.has_hash_content = True
-        if Patterns.MUSIC_SIGN.search(self.text):
-            self.structure.has_music = True
-
-        for line in self.lines:
-            line_stripped = line.strip()
-
-            # Checks for speaker identification
-            speaker_match = Patterns.SPEAKER.match(line_stripped)
-            if speaker_match:
-                raw_speaker = speaker_match.group(1).strip()
+        has_dashes = False
+        speakers = set()
+
+        for line in lines:
+            # Checks for leading dashes
+            if line.lstrip().startswith(DASHES):
+                has_dashes = True
+
+            # Checks for speaker identification: whatever precedes the first
+            # colon of the line (the name cleaner strips the surrounding spaces)
+            colon = line.find(":")
+            if colon > 0:
                 # Cleans the speaker name by removing CC/SDH elements
-                speaker_name = TextCleaner._clean_speaker_name(raw_speaker)
+                speaker_name = TextCleaner._clean_speaker_name(line[:colon])
                 if speaker_name:  # Only adds if something remains after cleaning
-                    self.structure.speakers.add(speaker_name)
-
-            if Patterns.LEADING_DASHES.match(line_stripped):
-                self.structure.has_dashes = True
+                    speakers.add(speaker_name)
+
+        # Checks content patterns; a membership test for the opening symbol
+        # rules out most texts without running the pattern at all
+        return SubtitleStructure(
+            speakers=frozenset(speakers),
+            has_dashes=has_dashes,
+            has_parentheses="(" in text and bool(Patterns.PARENTHESES.search(text)),
+            has_brackets="[" in text and bool(Patterns.BRACKETS.search(text)),
+            has_curly_brackets="{" in text
+            and bool(Patterns.CURLY_BRACKETS.search(text)),
+            has_hash_content="#" in text and bool(Patterns.HASH.search(text)),
+            has_music="♪" in text,
+            line_count=len(lines),
+        )
 
 
 class TextCleaner:
@@ -146,38 +190,47 @@ class TextCleaner:
     @staticmethod
     def clean_subtitle_auto(subtitle: Subtitle) -> Subtitle:
         """Applies AUTO-mode cleaning steps without requiring user review."""
-        cleaned = copy.deepcopy(subtitle)
-        text = TextCleaner._fix_lengthy_ellipsis(subtitle.text)
-        text = TextCleaner._final_cleanup(text)
-        cleaned.text = text
-        cleaned.lines = text.split("\n")
-        return cleaned
+        text = TextCleaner._clean_text_auto(subtitle.text)
+        # Already clean cues are common; they are returned as they are
+        return subtitle if text == subtitle.text else subtitle.with_text(text)
 
     @staticmethod
     def clean_subtitle_interactive(subtitle: Subtitle) -> Subtitle:
         """Applies INTERACTIVE-mode cleaning steps that require user review."""
-        cleaned = copy.deepcopy(subtitle)
-
-        text = subtitle.text
-        text = TextCleaner._remove_parentheses_content(text)
-        text = TextCleaner._remove_bracket_content(text)
-        text = TextCleaner._remove_curly_bracket_content(text)
-        text = TextCleaner._remove_hash_symbol_content(text)
-        text = TextCleaner._remove_music_indication(text)
-        text = TextCleaner._fix_double_hyphens(text)
+        # Only these structure facts affect the result, so they complete the
+        # cache key of the text cleaning
+        format_dashes = (
+            subtitle.structure.speaker_count > 1 or subtitle.structure.has_dashes
+        )
+        text = TextCleaner._clean_text_interactive(subtitle.text, format_dashes)
+        return subtitle if text == subtitle.text else subtitle.with_text(text)
 
-        cleaned_lines = []
-        for line in text.split("\n"):
-            line = TextCleaner._remove_speaker_identification(line).strip()
-            if line:
-                cleaned_lines.append(line)
+    # Subtitle files repeat many short cues ("Thanks.", music lines, ...), so
+    # the cleaned text of each cue is memoized
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _clean_text_auto(text: str) -> str:
+        """AUTO-mode cleaning of a subtitle text."""
+        text = TextCleaner._fix_lengthy_ellipsis(text)
+        return TextCleaner._final_cleanup(text)
 
-        text = TextCleaner._format_structure(subtitle, "\n".join(cleaned_lines))
-        text = TextCleaner._final_cleanup(text)
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _clean_text_interactive(text: str, format_dashes: bool) -> str:
+        """INTERACTIVE-mode cleaning of a subtitle text."""
+        # Fast path for the common case: nothing to remove and no dash
+        # formatting to apply, so only the final cleanup can change the text
+        if not format_dashes and not Patterns.CC_MARKERS.search(text):
+            return TextCleaner._final_cleanup(text)
+
+        text = TextCleaner._remove_special_content(text)
+        text = TextCleaner._fix_double_hyphens(text)
+        # Speakers are removed from every line at once; the lines left blank
+        # are dropped by _final_cleanup, which also strips them
+        text = TextCleaner._remove_speaker_identification(text)
 
-        cleaned.text = text
-        cleaned.lines = text.split("\n")
-        return cleaned
+        text = TextCleaner._format_structure(text, format_dashes)
+        return TextCleaner._final_cleanup(text)
 
     @staticmethod
     def _remove_parentheses_content(text: str) -> str:
@@ -202,7 +255,13 @@ class TextCleaner:
     @staticmethod
     def _remove_music_indication(text: str) -> str:
         """Removes musical indication symbols."""
-        return Patterns.MUSIC_SIGN.sub("", text)
+        # A single fixed character, so a plain replace beats any regex
+        return text.replace("♪", "")
+
+    @staticmethod
+    def _remove_special_content(text: str) -> str:
+        """Removes all delimited CC/SDH content and musical indications at once."""
+        return Patterns.SPECIAL_CONTENT.sub("", text)
 
     @staticmethod
     def _fix_double_hyphens(text: str) -> str:
@@ -217,11 +276,17 @@ class TextCleaner:
     @staticmethod
     def _remove_speaker_identification(text: str) -> str:
         """Removes speaker identification."""
-        # Removes only at the beginning of the line to avoid removing dialogues
-        return Patterns.SPEAKER.sub("", text)
+        # Removes only at the beginning of lines (up to the first colon) to
+        # avoid removing dialogues
+        lines = text.split("\n")
+        for i, line in enumerate(lines):
+            colon = line.find(":")
+            if colon > 0:
+                lines[i] = line[colon + 1 :]
+        return "\n".join(lines)
 
     @staticmethod
-    def _format_structure(subtitle: Subtitle, cleaned_text: str) -> str:
+    def _format_structure(cleaned_text: str, format_dashes: bool) -> str:
         """Formats the text structure based on the analysis of the original subtitle."""
         if not cleaned_text.strip():
             return cleaned_text
@@ -230,15 +295,10 @@ class TextCleaner:
 
         # DECISION: When to format with dashes?
         should_format = (
-            subtitle.structure.speaker_count > 1  # Multiple speakers
-            or subtitle.structure.has_dashes  # Already had dashes
+            format_dashes  # Multiple speakers or already had dashes
             or
             # Has dashes after cleaning
-            any(
-                Patterns.LEADING_DASHES.match(line.strip())
-                for line in cleaned_lines
-                if line.strip()
-            )
+            any(line.strip().startswith(DASHES) for line in cleaned_lines)
         )
 
         if not should_format:
@@ -253,7 +313,7 @@ class TextCleaner:
                 continue
 
             # Removes any residual dash for consistent reformatting
-            cleaned = Patterns.LEADING_DASHES.sub("", stripped)
+            cleaned = stripped[1:] if stripped.startswith(DASHES) else stripped
 
             if cleaned:
                 formatted_lines.append(f"-{cleaned}")
@@ -265,34 +325,28 @@ class TextCleaner:
     @staticmethod
     def _clean_speaker_name(raw_name: str) -> str:
         """Cleans the speaker name by removing CC/SDH elements."""
-        cleaned = raw_name
         # Removes all types of special content
-        cleaners = [
-            TextCleaner._remove_parentheses_content,
-            TextCleaner._remove_bracket_content,
-            TextCleaner._remove_curly_bracket_content,
-            TextCleaner._remove_hash_symbol_content,
-            TextCleaner._remove_music_indication,
-        ]
-
-        for cleaner in cleaners:
-            cleaned = cleaner(cleaned)
-
-        return cleaned.strip()
+        return TextCleaner._remove_special_content(raw_name).strip()
 
     @staticmethod
     def _final_cleanup(text: str) -> str:
         """Final cleanup of the text."""
-        lines = text.split("\n")
         cleaned_lines = []
 
-        for line in lines:
-            line = Patterns.MULTIPLE_SPACES.sub(" ", line)
-            line = line.strip()
-            line = re.sub(r"([\-\–\—])\s+", r"\1", line)
-            line = Patterns.SPACES_BEFORE_PUNCTUATION.sub(r"\1", line)
-            if line:
-                cleaned_lines.append(line)
+        for line in text.split("\n"):
+            # Strips the line and collapses whitespace runs into single spaces
+            line = " ".join(line.split())
+            if not line:
+                continue
+
+            if " " in line:
+                # Drops spaces before punctuation and after dashes
+                for punctuation in ".,!?;:":
+                    line = line.replace(f" {punctuation}", punctuation)
+                for dash in DASHES:
+                    line = line.replace(f"{dash} ", dash)
+
+            cleaned_lines.append(line)
 
         return "\n".join(cleaned_lines)
 
@@ -301,85 +355,40 @@ class SubtitleCleaner:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.subtitles: List[Subtitle] = []
-        self.original_content: List[str] = []
+        self.original_content = ""
         self.text_cleaner = TextCleaner()
 
     def load_subtitles(self) -> bool:
         """Loads the content of the SRT file."""
         try:
-            with open(self.file_path, "r", encoding="utf-8") as file:
-                self.original_content = file.readlines()
-            return True
-        except UnicodeDecodeError:
-            try:
-                with open(self.file_path, "r", encoding="latin-1") as file:
-                    self.original_content = file.readlines()
-                return True
-            except Exception as e:
-                print(f"Error reading file: {e}")
-                return False
+            raw = Path(self.file_path).read_bytes()
         except Exception as e:
             print(f"Error reading file: {e}")
             return False
 
-    def parse_subtitles(self):
-        """Parses the content of the SRT file into Subtitle objects."""
-        current_number = 0
-        current_start = ""
-        current_end = ""
-        current_text_lines = []
-
-        i = 0
-        while i < len(self.original_content):
-            line = self.original_content[i].rstrip("\n\r")
-
-            if not line.strip():
-                if current_number > 0 and current_text_lines:
-                    text = "\n".join(current_text_lines)
-                    subtitle = Subtitle(
-                        number=current_number,
-                        start_time=current_start,
-                        end_time=current_end,
-                        text=text,
-                        lines=current_text_lines.copy(),
-                    )
-                    self.subtitles.append(subtitle)
-                    current_text_lines = []
-                    current_number = 0
-
-                i += 1
-                continue
-
-            if line.isdigit() and not current_text_lines:
-                current_number = int(line)
-                i += 1
-                continue
-
-            if "-->" in line and current_number > 0:
-                times = line.split("-->")
-                if len(times) == 2:
-                    current_start = times[0].strip()
-                    current_end = times[1].strip()
-                i += 1
-                continue
-
-            if current_number > 0:
-                current_text_lines.append(line)
-                i += 1
-                continue
+        # The file is read once; only the decoding is retried
+        try:
+            content = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            content = raw.decode("latin-1")
 
-            i += 1
+        # Normalizes line endings as text-mode reading would
+        self.original_content = content.replace("\r\n", "\n").replace("\r", "\n")
+        return True
 
-        if current_number > 0 and current_text_lines:
-            text = "\n".join(current_text_lines)
-            subtitle = Subtitle(
-                number=current_number,
-                start_time=current_start,
-                end_time=current_end,
-                text=text,
-                lines=current_text_lines.copy(),
+    def parse_subtitles(self):
+        """Parses the content of the SRT file into Subtitle objects."""
+        for block in Patterns.SRT_BLOCK.finditer(self.original_content):
+            lines = block.group(4).rstrip("\n").split("\n")
+            self.subtitles.append(
+                Subtitle(
+                    number=int(block.group(1)),
+                    start_time=block.group(2).strip(),
+                    end_time=block.group(3).strip(),
+                    text="\n".join(lines),
+                    lines=lines,
+                )
             )
-            self.subtitles.append(subtitle)
 
     @staticmethod
     def _prompt_edit_lines(lines: List[str]) -> str:
@@ -467,10 +476,7 @@ class SubtitleCleaner:
             elif choice == "4":
                 new_text = self._prompt_edit_lines(auto_sub.lines)
                 if new_text:
-                    new_subtitle = copy.deepcopy(subtitle)
-                    new_subtitle.text = new_text
-                    new_subtitle.lines = new_text.split("\n")
-                    changes_made.append((subtitle, new_subtitle))
+                    changes_made.append((subtitle, subtitle.with_text(new_text)))
                     print("✓ Manual edit saved")
                 else:
                     print("✗ Empty text, keeping original")
@@ -503,28 +509,29 @@ class SubtitleCleaner:
         Path(self.file_path).rename(backup_path)
 
         try:
-            subtitle_dict = {sub.number: sub for sub in self.subtitles}
-            for old_sub, new_sub in changes:
-                subtitle_dict[old_sub.number] = new_sub
-
-            for i in sorted(to_remove, reverse=True):
-                if i < len(self.subtitles):
-                    sub_to_remove = self.subtitles[i]
-                    if sub_to_remove.number in subtitle_dict:
-                        del subtitle_dict[sub_to_remove.number]
-
-            final_subtitles = list(subtitle_dict.values())
-            final_subtitles.sort(key=lambda x: x.number)
+            # self.subtitles is already in file order, so one filtered pass
+            # replaces the changed subtitles and drops the removed ones. Both
+            # are matched by position, not number, since SRT files often
+            # repeat or skip cue numbers
+            changed = {id(old_sub): new_sub for old_sub, new_sub in changes}
+            removed = set(to_remove)
+            final_subtitles = [
+                changed.get(id(sub), sub)
+                for i, sub in enumerate(self.subtitles)
+                if i not in removed
+            ]
 
             for new_number, subtitle in enumerate(final_subtitles, 1):
                 subtitle.number = new_number
 
+            content = "".join(
+                f"{subtitle.number}\n"
+                f"{subtitle.start_time} --> {subtitle.end_time}\n"
+                f"{subtitle.text}\n\n"
+                for subtitle in final_subtitles
+            )
             with open(self.file_path, "w", encoding="utf-8") as outfile:
-                for subtitle in final_subtitles:
-                    outfile.write(f"{subtitle.number}\n")
-                    outfile.write(f"{subtitle.start_time} --> {subtitle.end_time}\n")
-                    outfile.write(f"{subtitle.text}\n")
-                    outfile.write("\n")
+                outfile.write(content)
 
             print(f"\n✓ Changes applied successfully!")
             print(f"✓ Backup saved as: {backup_path}")
@@ -4,13 +4,87 @@ Analyzes file fragmentation in a directory.
 """
 
 import argparse
+import os
 import re
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Summary printed by filefrag, e.g. "file.mkv: 12 extents found", which the
+# FIBMAP fallback follows with ", perfection would be N extents"
+EXTENTS_PATTERN = re.compile(r"(\d+)\s+extents? found")
+BATCH_SUMMARY_PATTERN = re.compile(r"^(.*): (\d+) extents? found", re.MULTILINE)
+
+# Number of files passed to each filefrag invocation
+BATCH_SIZE = 128
+
+
+def iter_files(root):
+    """Recursively yields the paths of regular files under root"""
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                # DirEntry type checks reuse the readdir d_type, avoiding a stat
+                # except for symlinks. Symlinked files are analyzed like
+                # regular ones, but symlinked directories aren't followed
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_files(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+    except PermissionError:
+        pass
+
+
+def count_extents(file_path):
+    """Runs filefrag on a file and returns its number of extents (fragments)"""
+    # Without -v filefrag prints only the one-line summary, not every extent
+    command = ["filefrag", file_path]
+    result = subprocess.run(
+        command, capture_output=True, text=True, errors="surrogateescape", check=True
+    )
 
-def analyze_fragmentation(directory, num_files=10):
+    # Extract the number before "extents found"
+    match = EXTENTS_PATTERN.search(result.stdout)
+    return int(match.group(1)) if match else None
+
+
+def count_extents_batch(file_paths):
+    """
+    Runs filefrag once for a batch of files and returns, in order, the number
+    of extents of each file. If filefrag fails for any of them, the files are
+    retried one by one and the failing entries hold the exception instead.
+    """
+    command = ["filefrag", *file_paths]
+    try:
+        # Paths are decoded like os.scandir does, so they map back exactly
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            check=True,
+        )
+    except subprocess.CalledProcessError:
+        # filefrag errors don't name the file, so find the culprit
+        outcomes = []
+        for file_path in file_paths:
+            try:
+                outcomes.append(count_extents(file_path))
+            except FileNotFoundError:
+                raise
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    extents = {
+        match.group(1): int(match.group(2))
+        for match in BATCH_SUMMARY_PATTERN.finditer(result.stdout)
+    }
+    return [extents.get(file_path) for file_path in file_paths]
+
+
+def analyze_fragmentation(directory, num_files=10, jobs=None):
     """Analyzes files and subdirectories to find the most fragmented files"""
     directory_path = Path(directory)
 
@@ -22,10 +96,7 @@ def analyze_fragmentation(directory, num_files=10):
     print(f"Analyzing fragmentation in '{directory}'...")
 
     # Find all regular files
-    files = []
-    for file_path in directory_path.rglob("*"):
-        if file_path.is_file():
-            files.append(file_path)
+    files = list(iter_files(directory))
 
     if not files:
         print("No files found in the directory.")
@@ -36,31 +107,39 @@ def analyze_fragmentation(directory, num_files=10):
 
     print(f"Processing {total_files} file(s)...")
 
-    for i, file_path in enumerate(files, 1):
-        try:
-            # Run filefrag to get fragmentation info
-            command = ["filefrag", "-v", str(file_path)]
-            result = subprocess.run(command, capture_output=True, text=True, check=True)
-
-            # Extract number of extents (fragments)
-            lines = result.stdout.split("\n")
-            for line in lines:
-                if "extents found" in line:
-                    # Extract the number before "extents found"
-                    match = re.search(r"(\d+)\s+extents? found", line)
-                    if match:
-                        fragments = int(match.group(1))
-                        results.append((file_path, fragments))
-
-            print(f"{i}. {file_path.name} [OK]")
-
-        except subprocess.CalledProcessError as e:
-            print(f"{i}. Error analyzing {file_path.name}: {e.stderr.strip()}")
-        except FileNotFoundError:
-            print("Error: filefrag not found. Install with: sudo apt install e2fsprogs")
-            sys.exit(1)
-        except Exception as e:
-            print(f"{i}. Unexpected error processing {file_path.name}: {str(e)}")
+    # Each filefrag run handles a whole batch of files, amortizing process
+    # startup; runs are dominated by that and the FIEMAP ioctl, so threads
+    # overlap them well. Results are still reported in file order.
+    batches = [files[i : i + BATCH_SIZE] for i in range(0, total_files, BATCH_SIZE)]
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        futures = [executor.submit(count_extents_batch, batch) for batch in batches]
+
+        i = 0
+        for batch, future in zip(batches, futures):
+            try:
+                outcomes = future.result()
+            except FileNotFoundError:
+                print(
+                    "Error: filefrag not found. Install with: sudo apt install e2fsprogs"
+                )
+                executor.shutdown(cancel_futures=True)
+                sys.exit(1)
+            except Exception as e:
+                outcomes = [e] * len(batch)
+
+            for file_path, outcome in zip(batch, outcomes):
+                i += 1
+                file_name = os.path.basename(file_path)
+
+                if isinstance(outcome, subprocess.CalledProcessError):
+                    print(f"{i}. Error analyzing {file_name}: {outcome.stderr.strip()}")
+                elif isinstance(outcome, Exception):
+                    print(f"{i}. Unexpected error processing {file_name}: {outcome}")
+                else:
+                    if outcome is not None:
+                        results.append((file_path, outcome))
+                    print(f"{i}. {file_name} [OK]")
 
     # Sort by fragmentation (highest first) and get top N
     results.sort(key=lambda x: x[1], reverse=True)
@@ -98,6 +177,7 @@ Examples:
   %(prog)s /home/user/data
   %(prog)s /var/log 5
   %(prog)s . 20
+  %(prog)s --jobs 4 /home/user/data
         """,
     )
 
@@ -109,10 +189,20 @@ Examples:
         default=10,
         help="Number of files to show (default: 10)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Maximum number of concurrent filefrag runs (default: %(default)s)",
+    )
 
     args = parser.parse_args()
 
-    results = analyze_fragmentation(args.directory, args.num_files)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    results = analyze_fragmentation(args.directory, args.num_files, args.jobs)
     format_results(results)
 
     if results:
@@ -4,12 +4,65 @@ Converts MP4+SRT pairs to MKV with embedded subtitles.
 """
 
 import argparse
+import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def process_files(input_dir, output_dir):
+def convert_one(mp4_file, output_path):
+    """Converts a single MP4+SRT pair to MKV, returning (success, message)"""
+    # Corresponding SRT file and output MKV file, built as plain strings
+    mp4_path = os.fspath(mp4_file)
+    base, _ = os.path.splitext(mp4_path)
+    srt_path = base + ".srt"
+    mp4_name = os.path.basename(mp4_path)
+
+    if not os.path.isfile(srt_path):
+        return False, f"Warning: SRT not found for {mp4_name}"
+
+    mkv_name = os.path.basename(base) + ".mkv"
+    mkv_path = os.path.join(output_path, mkv_name)
+
+    # FFmpeg command
+    command = [
+        "ffmpeg",
+        # No terminal interaction and only errors on stderr, which is captured
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        mp4_path,
+        "-i",
+        srt_path,
+        "-map",
+        "0",
+        "-map",
+        "1",
+        "-c",
+        "copy",
+        "-c:s",
+        "srt",
+        "-metadata:s:s:0",
+        "language=en",
+        "-metadata:s:s:0",
+        "title=EN",
+        "-disposition:s:0",
+        "default",
+        "-y",
+        mkv_path,
+    ]
+
+    try:
+        subprocess.run(command, capture_output=True, text=True, check=True)
+        return True, f"{mkv_name} [OK]"
+    except subprocess.CalledProcessError as e:
+        return False, f"Error processing {mp4_name}: {e.stderr.strip()}"
+
+
+def process_files(input_dir, output_dir, jobs=1):
     """Processes MP4 and SRT files from the input directory and saves them in the output directory"""
     input_path = Path(input_dir)
     output_path = Path(output_dir)
@@ -26,9 +79,17 @@ def process_files(input_dir, output_dir):
         print(f"Error: Output path '{output_dir}' is not a valid directory.")
         sys.exit(1)
 
-    # Find MP4 files
-    mp4_files = list(input_path.glob("*.mp4"))
-    mp4_files.sort()
+    # Find MP4 files (DirEntry carries the name and type, so listing needs no
+    # per-file stat or Path objects)
+    with os.scandir(input_path) as entries:
+        mp4_files = sorted(
+            (
+                entry
+                for entry in entries
+                if entry.name.endswith(".mp4") and entry.is_file()
+            ),
+            key=lambda entry: entry.name,
+        )
 
     if not mp4_files:
         print("No MP4 files found in the input directory.")
@@ -39,52 +100,25 @@ def process_files(input_dir, output_dir):
 
     print(f"Processing {total_files} MP4 file(s)...")
 
-    for i, mp4_file in enumerate(mp4_files, 1):
-        # Corresponding SRT file
-        srt_file = mp4_file.with_suffix(".srt")
-
-        if not srt_file.exists():
-            print(f"{i}. Warning: SRT not found for {mp4_file.name}")
-            continue
-
-        # Output MKV file
-        mkv_file = output_path / mp4_file.with_suffix(".mkv").name
-
-        # FFmpeg command
-        command = [
-            "ffmpeg",
-            "-i",
-            str(mp4_file),
-            "-i",
-            str(srt_file),
-            "-map",
-            "0",
-            "-map",
-            "1",
-            "-c",
-            "copy",
-            "-c:s",
-            "srt",
-            "-metadata:s:s:0",
-            "language=en",
-            "-metadata:s:s:0",
-            "title=EN",
-            "-disposition:s:0",
-            "default",
-            "-y",
-            str(mkv_file),
+    # Stream copies are short and I/O-bound, so running several ffmpeg
+    # processes at once keeps the disk busy; results are reported in order
+    with ThreadPoolExecutor(max_workers=min(jobs, total_files)) as executor:
+        futures = [
+            executor.submit(convert_one, mp4_file, output_path)
+            for mp4_file in mp4_files
         ]
 
-        try:
-            subprocess.run(command, capture_output=True, text=True, check=True)
-            print(f"{i}. {mkv_file.name} [OK]")
-            success_count += 1
+        for i, future in enumerate(futures, 1):
+            try:
+                ok, message = future.result()
+            except FileNotFoundError:
+                print("Error: FFmpeg not found. Install with: sudo apt install ffmpeg")
+                executor.shutdown(cancel_futures=True)
+                sys.exit(1)
 
-        except subprocess.CalledProcessError as e:
-            print(f"{i}. Error processing {mp4_file.name}: {e.stderr.strip()}")
-        except FileNotFoundError:
-            print("Error: FFmpeg not found. Install with: sudo apt install ffmpeg")
-            sys.exit(1)
+            print(f"{i}. {message}")
+            if ok:
+                success_count += 1
 
     return success_count == total_files
 
@@ -97,15 +131,26 @@ def main():
 Examples:
   %(prog)s ./videos ./converted
   %(prog)s . ./output
+  %(prog)s --jobs 4 ./videos ./converted
         """,
     )
 
     parser.add_argument("input_dir", help="Input directory with MP4 and SRT files")
     parser.add_argument("output_dir", help="Output directory for MKV files")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Maximum number of concurrent ffmpeg runs (default: %(default)s)",
+    )
 
     args = parser.parse_args()
 
-    if process_files(args.input_dir, args.output_dir):
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if process_files(args.input_dir, args.output_dir, args.jobs):
         print("Conversion completed successfully!")
     else:
         print("Conversion completed with errors.")
@@ -4,6 +4,7 @@ Renames files using names from an external file.
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 
@@ -29,8 +30,10 @@ def rename_files(input_dir, names_file, append_mode=True):
 
     # Read names from file
     try:
-        with open(names_path, "r", encoding="utf-8") as f:
-            names = [line.strip() for line in f.readlines() if line.strip()]
+        # Split on newlines only, like readlines(): splitlines() also breaks on
+        # form feeds and Unicode separators (U+2028...), shifting later names
+        lines = names_path.read_text(encoding="utf-8").split("\n")
+        names = [name for name in map(str.strip, lines) if name]
     except Exception as e:
         print(f"Error reading names file: {e}")
         return False
@@ -53,8 +56,19 @@ def rename_files(input_dir, names_file, append_mode=True):
     mode = "APPEND" if append_mode else "REPLACE"
     print(f"Processing {len(files)} file(s) in {mode} mode...")
 
-    # Rename the files
+    # Rename relative to an open descriptor of the directory (renameat), so the
+    # kernel doesn't resolve the directory path again for every file
+    dir_fd = None
+    if os.rename in os.supports_dir_fd:
+        try:
+            dir_fd = os.open(input_path, os.O_RDONLY)
+        except OSError:
+            pass
+
+    # Rename the files, collecting the report so it is written all at once
+    # instead of flushing the terminal after every file
     success_count = 0
+    report = []
     for i, (old_file, new_name_text) in enumerate(zip(files, names), 1):
         # Determine new name based on mode
         if append_mode:
@@ -67,15 +81,22 @@ def rename_files(input_dir, names_file, append_mode=True):
             extension = old_file.suffix
             new_name = f"{new_name_text}{extension}"
 
-        new_path = old_file.parent / new_name
-
         try:
-            old_file.rename(new_path)
-            print(f"{i}. {old_file.name} -> {new_name}")
+            if dir_fd is not None:
+                os.rename(old_file.name, new_name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+            else:
+                os.rename(old_file, os.path.join(input_dir, new_name))
+            report.append(f"{i}. {old_file.name} -> {new_name}")
             success_count += 1
 
         except Exception as e:
-            print(f"{i}. {old_file.name} [FAIL: {e}]")
+            report.append(f"{i}. {old_file.name} [FAIL: {e}]")
+
+    if dir_fd is not None:
+        os.close(dir_fd)
+
+    if report:
+        print("\n".join(report))
 
     return success_count == len(files)
 
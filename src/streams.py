@@ -18,13 +18,14 @@ def streams(filename):
     command = ["ffmpeg", "-hide_banner", "-i", filename]
 
     try:
-        # Run the command and capture the output
-        result = subprocess.run(command, stderr=subprocess.PIPE, text=True)
-
-        # Filter lines containing "Stream"
-        for line in result.stderr.split("\n"):
-            if "Stream" in line:
-                print(line)
+        # Run the command and read its output as it is produced
+        with subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        ) as process:
+            # Filter lines containing "Stream", decoding only the ones printed
+            for line in process.stderr:
+                if b"Stream" in line:
+                    print(line.rstrip(b"\r\n").decode("utf-8", errors="replace"))
 
         return 0
     except FileNotFoundError:
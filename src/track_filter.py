@@ -4,11 +4,32 @@ Processes MKV files, keeping selected subtitles and audio tracks.
 """
 
 import argparse
-import shutil
+import json
+import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Common language variations
+PT_BR_LANGS = frozenset(
+    {"pt-br", "pt_br", "ptbr", "por-br", "por_br", "porbr", "bra", "brasil", "brazil"}
+)
+PT_LANGS = frozenset({"pt", "por", "portuguese"})
+EN_LANGS = frozenset(
+    {"en", "eng", "english", "en-us", "en_us", "enus", "en-gb", "en_gb", "engb"}
+)
+JP_LANGS = frozenset({"jp", "jpn", "japanese", "ja", "jap"})
+
+# Audio languages accepted for each --audio choice
+LANG_VARIATIONS = {"pt": PT_LANGS | PT_BR_LANGS, "en": EN_LANGS, "jp": JP_LANGS}
+
+# English subtitles are matched on the plain tags only
+EN_SUBTITLE_LANGS = frozenset({"en", "eng", "english"})
+
+# Title fragments marking forced, hearing-impaired or otherwise partial subtitles
+SPECIAL_TITLE_TAGS = ("forced", "sdh", "hi", "hearing", "signs", "dub")
+
 
 def parse_arguments():
     """Parses command-line arguments"""
@@ -20,6 +41,7 @@ Examples:
   %(prog)s --pt ./videos ./output
   %(prog)s --en --default=en --audio=en ./movies ./processed
   %(prog)s --pt --en --default=pt --audio=pt ./series ./final
+  %(prog)s --pt --jobs 2 ./videos ./output
         """,
     )
 
@@ -43,8 +65,20 @@ Examples:
     parser.add_argument("input_dir", help="Input directory with MKV files")
     parser.add_argument("output_dir", help="Output directory for processed files")
 
+    # Parallelism
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // 2),
+        help="Maximum number of files processed concurrently (default: %(default)s)",
+    )
+
     args = parser.parse_args()
 
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     # Validations
     if not args.pt and not args.en:
         parser.error("Specify at least one subtitle (--pt and/or --en)")
@@ -68,247 +102,155 @@ Examples:
         args.audio,
         Path(args.input_dir),
         Path(args.output_dir),
+        args.jobs,
     )
 
 
-def find_audio_track(input_file, target_lang):
+def probe_streams(input_file):
+    """
+    Returns the audio and subtitle streams of a file (index, codec type,
+    language/title tags and dispositions) from a single ffprobe run
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        # Languages, titles and dispositions come from the container header,
+        # so reading is capped at 1 MB and stream analysis at 0.1 s (0 would
+        # mean the default of about 5 s)
+        "-probesize",
+        "1M",
+        "-analyzeduration",
+        "100000",
+        "-print_format",
+        "json",
+        "-show_entries",
+        "stream=index,codec_type:stream_tags=language,title"
+        ":stream_disposition=forced,hearing_impaired",
+        input_file,
+    ]
+
+    # json.loads decodes the UTF-8 bytes itself, no text mode needed
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    return json.loads(result.stdout).get("streams", [])
+
+
+def _stream_language(stream):
+    """Returns the normalized language tag of a stream"""
+    return stream.get("tags", {}).get("language", "").strip().lower()
+
+
+def find_audio_track(streams, target_lang):
     """Finds the index of the audio track in the specified language"""
-    try:
-        cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "stream=index:stream_tags=language",
-            "-select_streams",
-            "a",
-            input_file,
-        ]
+    accepted_langs = LANG_VARIATIONS.get(target_lang, frozenset())
 
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
-
-        current_index = None
-        found_index = None
-
-        for line in output.split("\n"):
-            if line.startswith("index="):
-                current_index = line.split("=")[1]
-            elif line.startswith("TAG:language="):
-                lang = line.split("=")[1].strip().lower()
-
-                # Maps common language variations
-                lang_variations = {
-                    "pt": [
-                        "pt",
-                        "por",
-                        "portuguese",
-                        "pt-br",
-                        "pt_br",
-                        "ptbr",
-                        "por-br",
-                        "por_br",
-                        "porbr",
-                        "bra",
-                        "brasil",
-                        "brazil",
-                    ],
-                    "en": [
-                        "en",
-                        "eng",
-                        "english",
-                        "en-us",
-                        "en_us",
-                        "enus",
-                        "en-gb",
-                        "en_gb",
-                        "engb",
-                    ],
-                    "jp": ["jp", "jpn", "japanese", "ja", "jap"],
-                }
-
-                # Checks if the found language matches the target language
-                if lang in lang_variations.get(target_lang, []):
-                    found_index = current_index
-                    break  # Gets the first track found in the desired language
-
-        return found_index
+    for stream in streams:
+        if stream.get("codec_type") != "audio":
+            continue
 
-    except subprocess.CalledProcessError:
-        return None
+        # Checks if the found language matches the target language
+        if _stream_language(stream) in accepted_langs:
+            # Gets the first track found in the desired language
+            return str(stream["index"])
+
+    return None
 
 
-def find_portuguese_subtitle(input_file):
+def find_portuguese_subtitle(streams):
     """Finds the index of the Portuguese subtitle, preferring pt-BR"""
-    try:
-        cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "stream=index:stream_tags=language",
-            "-select_streams",
-            "s",
-            input_file,
-        ]
+    pt_br_index = None
+    pt_index = None
 
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
-
-        pt_br_index = None
-        pt_index = None
-        current_index = None
-
-        for line in output.split("\n"):
-            if line.startswith("index="):
-                current_index = line.split("=")[1]
-            elif line.startswith("TAG:language="):
-                lang = line.split("=")[1].strip().lower()
-
-                if lang in (
-                    "pt-br",
-                    "pt_br",
-                    "ptbr",
-                    "por-br",
-                    "por_br",
-                    "porbr",
-                    "bra",
-                    "brasil",
-                    "brazil",
-                ):
-                    pt_br_index = current_index
-                elif lang in ("pt", "por", "portuguese") and pt_br_index is None:
-                    pt_index = current_index
-
-        return pt_br_index if pt_br_index is not None else pt_index
+    for stream in streams:
+        if stream.get("codec_type") != "subtitle":
+            continue
 
-    except subprocess.CalledProcessError:
-        return None
+        lang = _stream_language(stream)
 
+        if lang in PT_BR_LANGS:
+            pt_br_index = str(stream["index"])
+        elif lang in PT_LANGS and pt_br_index is None:
+            pt_index = str(stream["index"])
 
-def find_english_subtitle(input_file):
+    return pt_br_index if pt_br_index is not None else pt_index
+
+
+def find_english_subtitle(streams):
     """Finds the index of the English subtitle (prefers non-forced)"""
-    try:
-        cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "stream=index:stream_tags=language,title",
-            "-show_entries",
-            "stream_disposition=forced,hearing_impaired",
-            "-select_streams",
-            "s",
-            input_file,
-        ]
+    candidates = [
+        stream
+        for stream in streams
+        if stream.get("codec_type") == "subtitle"
+        and _stream_language(stream) in EN_SUBTITLE_LANGS
+    ]
+
+    def rank(stream):
+        """Preference order: normal > forced > hearing impaired/special title"""
+        disposition = stream.get("disposition", {})
+        if disposition.get("forced") == 1:
+            return 1
+        title = stream.get("tags", {}).get("title", "").strip().lower()
+        if disposition.get("hearing_impaired") == 1 or any(
+            special in title for special in SPECIAL_TITLE_TAGS
+        ):
+            return 2
+        return 0
 
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
-
-        normal_sub_index = None
-        forced_sub_index = None
-        hearing_impaired_sub_index = None
-
-        current_index = None
-        current_lang = None
-        current_title = None
-        current_forced = False
-        current_hearing_impaired = False
-
-        lines = output.split("\n")
-        for line in lines:
-            line = line.strip().lower()
-
-            if line.startswith("[stream]"):
-                # Reset for new stream
-                current_index = None
-                current_lang = None
-                current_title = None
-                current_forced = False
-                current_hearing_impaired = False
-
-            elif line.startswith("[/stream]"):
-                # Process complete stream
-                if current_lang and current_lang in ("en", "eng", "english"):
-                    # Checks if it's special by the title
-                    title_special = False
-                    if current_title:
-                        title_special = any(
-                            special in current_title
-                            for special in [
-                                "forced",
-                                "sdh",
-                                "hi",
-                                "hearing",
-                                "signs",
-                                "dub",
-                            ]
-                        )
-
-                    is_special = (
-                        current_forced or current_hearing_impaired or title_special
-                    )
-
-                    if not is_special:
-                        normal_sub_index = current_index
-                    elif current_forced:
-                        forced_sub_index = current_index
-                    elif current_hearing_impaired or title_special:
-                        hearing_impaired_sub_index = current_index
-
-            elif line.startswith("index="):
-                current_index = line.split("=")[1]
-            elif line.startswith("tag:language="):
-                current_lang = line.split("=")[1].strip()
-            elif line.startswith("tag:title="):
-                current_title = line.split("=")[1].strip()
-            elif line.startswith("disposition:forced="):
-                current_forced = line.split("=")[1].strip() == "1"
-            elif line.startswith("disposition:hearing_impaired="):
-                current_hearing_impaired = line.split("=")[1].strip() == "1"
-
-        # Preference order
-        return normal_sub_index or forced_sub_index or hearing_impaired_sub_index
+    # The last stream of the best kind wins on ties
+    best_subtitle = min(reversed(candidates), key=rank, default=None)
 
-    except subprocess.CalledProcessError:
-        return None
+    return str(best_subtitle["index"]) if best_subtitle else None
+
+
+def fsync_path(path):
+    """Flushes a file or directory to disk"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 def process_mkv_file(
-    input_file, output_file, keep_pt, keep_en, default_lang, audio_lang, file_index
+    input_file, output_file, keep_pt, keep_en, default_lang, audio_lang
 ):
-    """Processes an MKV file keeping the specified subtitles and audio"""
-    input_path = Path(input_file)
-    file_name = input_path.name
-
+    """
+    Processes an MKV file keeping the specified subtitles and audio,
+    returning the status to report
+    """
     # Ensures output directory
     output_file.parent.mkdir(parents=True, exist_ok=True)
     temp_file = output_file.with_name(f"{output_file.stem}_temp.mkv")
 
+    # Probes all streams once for the subtitle and audio lookups
+    try:
+        streams = probe_streams(input_file)
+    except (subprocess.CalledProcessError, ValueError):
+        streams = []
+
     # Finds subtitles
-    pt_sub_index = find_portuguese_subtitle(input_file) if keep_pt else None
-    en_sub_index = find_english_subtitle(input_file) if keep_en else None
+    pt_sub_index = find_portuguese_subtitle(streams) if keep_pt else None
+    en_sub_index = find_english_subtitle(streams) if keep_en else None
 
     # Finds audio if specified
-    audio_index = find_audio_track(input_file, audio_lang) if audio_lang else None
+    audio_index = find_audio_track(streams, audio_lang) if audio_lang else None
 
     # Validates found subtitles
     if keep_pt and not pt_sub_index:
-        print(f"{file_index}. {file_name} [FAIL: PT subtitle not found]")
-        return False
+        return "FAIL: PT subtitle not found"
     if keep_en and not en_sub_index:
-        print(f"{file_index}. {file_name} [FAIL: EN subtitle not found]")
-        return False
+        return "FAIL: EN subtitle not found"
 
     # Validates found audio
     if audio_lang and not audio_index:
-        print(f"{file_index}. {file_name} [FAIL: audio {audio_lang.upper()} not found]")
-        return False
+        return f"FAIL: audio {audio_lang.upper()} not found"
 
     try:
         # Builds ffmpeg command
         ffmpeg_cmd = [
             "ffmpeg",
+            # Runs alongside other ffmpeg processes, so keep it off the terminal
+            "-nostdin",
             "-i",
             input_file,
             "-map",
@@ -348,32 +290,35 @@ def process_mkv_file(
         # Sets audio codec (copy to keep quality)
         ffmpeg_cmd.extend(["-c:a", "copy"])
 
-        ffmpeg_cmd.append(str(temp_file))
+        ffmpeg_cmd.append(os.fspath(temp_file))
 
         # Executes conversion
         subprocess.run(
             ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
         )
 
-        # Moves final file
+        # Replaces the output atomically (the temp file is in the same
+        # directory), so it is never missing or half-written, even on a crash
         if temp_file.exists():
-            if output_file.exists():
-                output_file.unlink()
-            shutil.move(str(temp_file), str(output_file))
+            fsync_path(temp_file)
+            os.replace(temp_file, output_file)
+            # The output is already in place, so failing to persist the
+            # rename (e.g. a filesystem without directory fsync) is not fatal
+            try:
+                fsync_path(output_file.parent)
+            except OSError:
+                pass
 
-        print(f"{file_index}. {file_name} [OK]")
-        return True
+        return "OK"
 
     except subprocess.CalledProcessError:
-        print(f"{file_index}. {file_name} [FAIL: ffmpeg error]")
         if temp_file.exists():
             temp_file.unlink()
-        return False
-    except OSError as e:
-        print(f"{file_index}. {file_name} [FAIL: file error]")
+        return "FAIL: ffmpeg error"
+    except OSError:
         if temp_file.exists():
             temp_file.unlink()
-        return False
+        return "FAIL: file error"
 
 
 def main():
@@ -397,7 +342,7 @@ def main():
         sys.exit(1)
 
     # Parse arguments
-    keep_pt, keep_en, default_lang, audio_lang, input_dir, output_dir = (
+    keep_pt, keep_en, default_lang, audio_lang, input_dir, output_dir, jobs = (
         parse_arguments()
     )
 
@@ -408,8 +353,17 @@ def main():
     # Creates output directory
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Processes files
-    mkv_files = sorted(input_dir.glob("*.mkv"))
+    # Processes files (DirEntry carries the name and type, so listing needs no
+    # per-file stat or Path objects)
+    with os.scandir(input_dir) as entries:
+        mkv_files = sorted(
+            (
+                entry
+                for entry in entries
+                if entry.name.endswith(".mkv") and entry.is_file()
+            ),
+            key=lambda entry: entry.name,
+        )
 
     if not mkv_files:
         print("No MKV files found.")
@@ -417,13 +371,27 @@ def main():
 
     print(f"Processing {len(mkv_files)} MKV file(s)...")
 
+    # Each file costs one ffprobe run and an ffmpeg remux, mostly waiting on
+    # I/O, so a bounded thread pool overlaps them; results are reported in order
     success_count = 0
-    for i, mkv_file in enumerate(mkv_files, 1):
-        output_file = output_dir / mkv_file.name
-        if process_mkv_file(
-            str(mkv_file), output_file, keep_pt, keep_en, default_lang, audio_lang, i
-        ):
-            success_count += 1
+    with ThreadPoolExecutor(max_workers=min(jobs, len(mkv_files))) as executor:
+        futures = [
+            executor.submit(
+                process_mkv_file,
+                os.fspath(mkv_file),
+                output_dir / mkv_file.name,
+                keep_pt,
+                keep_en,
+                default_lang,
+                audio_lang,
+            )
+            for mkv_file in mkv_files
+        ]
+        for i, (mkv_file, future) in enumerate(zip(mkv_files, futures), 1):
+            status = future.result()
+            print(f"{i}. {mkv_file.name} [{status}]")
+            if status == "OK":
+                success_count += 1
 
     print(f"Processing completed! {success_count}/{len(mkv_files)} file(s) processed.")
 
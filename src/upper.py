@@ -9,13 +9,22 @@ import sys
 
 def rename_files_to_upper(directory):
     """Renames file names (except extension) to UPPERCASE"""
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-
-        # Ignore directories
-        if os.path.isdir(filepath):
+    # The report is written all at once instead of flushing after every file
+    report = []
+
+    # The listing is read in full before renaming, since entries renamed while
+    # the directory is still being read may be skipped or seen twice
+    with os.scandir(directory) as entries:
+        entries = list(entries)
+
+    for entry in entries:
+        # Ignore directories (the type comes from the directory read, so
+        # only symlinks cost an extra stat)
+        if entry.is_dir():
             continue
 
+        filename = entry.name
+
         # Split name and extension
         name, ext = os.path.splitext(filename)
         # Name in uppercase, extension in lowercase
@@ -25,10 +34,13 @@ def rename_files_to_upper(directory):
         # Avoid renaming if there is no change
         if new_filename != filename:
             try:
-                os.rename(filepath, new_filepath)
-                print(f"Renamed: {filename} -> {new_filename}")
+                os.rename(entry.path, new_filepath)
+                report.append(f"Renamed: {filename} -> {new_filename}")
             except OSError as e:
-                print(f"Error renaming {filename}: {e}")
+                report.append(f"Error renaming {filename}: {e}")
+
+    if report:
+        print("\n".join(report))
 
 
 if __name__ == "__main__":
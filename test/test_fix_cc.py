@@ -1,4 +1,4 @@
-from src.fix_cc import Subtitle, TextCleaner
+from src.fix_cc import Subtitle, SubtitleCleaner, TextCleaner
 
 
 class TestSubtitleCleaner:
@@ -92,6 +92,23 @@ class TestSubtitleCleaner:
         assert TextCleaner._remove_music_indication("♪♪") == ""
         assert TextCleaner._remove_music_indication("♪") == ""
 
+    def test_remove_special_content(self):
+        assert (
+            TextCleaner._remove_special_content("(Hello) [there] {big} #wide# ♪world")
+            == "    world"
+        )
+        assert (
+            TextCleaner._remove_special_content("Hello (this spans\ntwo lines) world")
+            == "Hello  world"
+        )
+        assert TextCleaner._remove_special_content("[a (nested) one]") == ""
+        assert TextCleaner._remove_special_content("Hello world") == "Hello world"
+
+    def test_remove_special_content_unclosed_delimiters(self):
+        text = "(" * 5000 + "[{#" + "a" * 5000
+        assert TextCleaner._remove_special_content(text) == text
+        assert TextCleaner._remove_special_content("(a (b) c") == " c"
+
     def test_replace_double_hyphens(self):
         assert TextCleaner._fix_double_hyphens("It wasn't--") == "It wasn't\u2014"
         assert TextCleaner._fix_double_hyphens("It was not--") == "It was not\u2014"
@@ -159,6 +176,14 @@ class TestSubtitleCleaner:
             == " how are you?"
         )
 
+    def test_remove_speaker_identification_multiline(self):
+        assert (
+            TextCleaner._remove_speaker_identification(
+                "JOHN: Hi.\nMARY: Hello.\nNo speaker"
+            )
+            == " Hi.\n Hello.\nNo speaker"
+        )
+
     # -----------------------------------
     # Final cleanup and formatting tests
     # -----------------------------------
@@ -434,6 +459,32 @@ class TestSubtitleCleaner:
         assert not subtitle.structure.has_music
         assert not subtitle.structure.has_dashes
 
+    def test_structure_is_shared_by_identical_texts(self):
+        first, second = (
+            Subtitle(
+                number=number,
+                start_time="00:00:01,000",
+                end_time="00:00:03,000",
+                text="SHELDON: Bazinga!",
+                lines=["SHELDON: Bazinga!"],
+            )
+            for number in (1, 2)
+        )
+        assert first.structure is second.structure
+        assert first.structure.speakers == frozenset({"SHELDON"})
+
+    def test_structure_is_kept_by_with_text(self):
+        subtitle = Subtitle(
+            number=1,
+            start_time="00:00:01,000",
+            end_time="00:00:03,000",
+            text="SHELDON: I have a theory!\nLEONARD: Not again...",
+        )
+        cleaned = subtitle.with_text("-I have a theory!\n-Not again...")
+        assert cleaned.structure is subtitle.structure
+        assert cleaned.lines == ["-I have a theory!", "-Not again..."]
+        assert cleaned.original_text == subtitle.original_text
+
     def test_speaker_name_cleaning_with_special_chars(self):
         subtitle = Subtitle(
             number=1,
@@ -682,6 +733,40 @@ class TestSubtitleCleaner:
         result = TextCleaner.clean_subtitle(subtitle)
         assert result.text == expected
 
+    def test_clean_subtitle_interactive_without_markers_is_unchanged(self):
+        subtitle = Subtitle(
+            number=1,
+            start_time="00:00:01,000",
+            end_time="00:00:03,000",
+            text="Hello world.\nHow are you today?",
+        )
+        assert TextCleaner.clean_subtitle_interactive(subtitle) is subtitle
+
+    def test_clean_subtitle_already_clean_is_unchanged(self):
+        subtitle = Subtitle(
+            number=1,
+            start_time="00:00:01,000",
+            end_time="00:00:03,000",
+            text="-Hello.\n-Hi, how are you?",
+        )
+        assert TextCleaner.clean_subtitle(subtitle) is subtitle
+
+    def test_clean_subtitle_same_text_with_different_structure(self):
+        plain = Subtitle(
+            number=1,
+            start_time="00:00:01,000",
+            end_time="00:00:03,000",
+            text="Hi.\nBye.",
+        )
+        dashed = Subtitle(
+            number=2,
+            start_time="00:00:04,000",
+            end_time="00:00:06,000",
+            text="- Hi.\n- Bye.",
+        ).with_text("Hi.\nBye.")
+        assert TextCleaner.clean_subtitle(plain).text == "Hi.\nBye."
+        assert TextCleaner.clean_subtitle(dashed).text == "-Hi.\n-Bye."
+
     def test_clean_subtitle_empty_subtitle(self):
         subtitle = Subtitle(
             number=1,
@@ -773,3 +858,100 @@ class TestSubtitleCleaner:
         )
         result = TextCleaner.clean_subtitle(subtitle)
         assert result.text == "It wasn't\u2014Joyce Kim,\nLeslie Winkle..."
+
+    # -------------------
+    # SRT parsing tests
+    # -------------------
+
+    def test_parse_subtitles(self, tmp_path):
+        srt_file = tmp_path / "sample.srt"
+        srt_file.write_text(
+            "1\n"
+            "00:00:01,000 --> 00:00:03,000\n"
+            "SHELDON: I have a theory!\n"
+            "LEONARD: Not again...\n"
+            "\n"
+            "2\n"
+            "00:00:04,000 --> 00:00:05,500\n"
+            "(sighs)\n"
+            "\n",
+            encoding="utf-8",
+        )
+        cleaner = SubtitleCleaner(str(srt_file))
+        assert cleaner.load_subtitles()
+        cleaner.parse_subtitles()
+
+        assert [sub.number for sub in cleaner.subtitles] == [1, 2]
+        first, second = cleaner.subtitles
+        assert first.start_time == "00:00:01,000"
+        assert first.end_time == "00:00:03,000"
+        assert first.text == "SHELDON: I have a theory!\nLEONARD: Not again..."
+        assert first.lines == ["SHELDON: I have a theory!", "LEONARD: Not again..."]
+        assert second.start_time == "00:00:04,000"
+        assert second.end_time == "00:00:05,500"
+        assert second.text == "(sighs)"
+
+    def test_parse_subtitles_crlf_and_missing_final_blank_line(self, tmp_path):
+        srt_file = tmp_path / "sample.srt"
+        srt_file.write_bytes(
+            b"1\r\n00:00:01,000 --> 00:00:03,000\r\nHello\r\n  \r\n"
+            b"2\r\n00:00:04,000 --> 00:00:05,000\r\nWorld"
+        )
+        cleaner = SubtitleCleaner(str(srt_file))
+        assert cleaner.load_subtitles()
+        cleaner.parse_subtitles()
+
+        assert [sub.text for sub in cleaner.subtitles] == ["Hello", "World"]
+        assert cleaner.subtitles[1].end_time == "00:00:05,000"
+
+    def test_apply_changes_writes_renumbered_file(self, tmp_path):
+        srt_file = tmp_path / "sample.srt"
+        srt_file.write_text(
+            "1\n00:00:01,000 --> 00:00:02,000\n(sighs)\n\n"
+            "2\n00:00:03,000 --> 00:00:04,000\nSHELDON: Hello\n\n"
+            "3\n00:00:05,000 --> 00:00:06,000\nGoodbye\n\n",
+            encoding="utf-8",
+        )
+        cleaner = SubtitleCleaner(str(srt_file))
+        assert cleaner.load_subtitles()
+        cleaner.parse_subtitles()
+
+        changed = cleaner.subtitles[1]
+        cleaner.apply_changes([(changed, changed.with_text("Hello"))], [0])
+
+        assert srt_file.read_text(encoding="utf-8") == (
+            "1\n00:00:03,000 --> 00:00:04,000\nHello\n\n"
+            "2\n00:00:05,000 --> 00:00:06,000\nGoodbye\n\n"
+        )
+        assert (tmp_path / "sample.srt.backup").exists()
+
+    def test_apply_changes_with_repeated_cue_numbers(self, tmp_path):
+        srt_file = tmp_path / "sample.srt"
+        srt_file.write_text(
+            "1\n00:00:01,000 --> 00:00:02,000\n(sighs)\n\n"
+            "1\n00:00:03,000 --> 00:00:04,000\nSHELDON: Hello\n\n"
+            "1\n00:00:05,000 --> 00:00:06,000\nGoodbye\n\n",
+            encoding="utf-8",
+        )
+        cleaner = SubtitleCleaner(str(srt_file))
+        assert cleaner.load_subtitles()
+        cleaner.parse_subtitles()
+
+        changed = cleaner.subtitles[1]
+        cleaner.apply_changes([(changed, changed.with_text("Hello"))], [0])
+
+        assert srt_file.read_text(encoding="utf-8") == (
+            "1\n00:00:03,000 --> 00:00:04,000\nHello\n\n"
+            "2\n00:00:05,000 --> 00:00:06,000\nGoodbye\n\n"
+        )
+
+    def test_load_subtitles_falls_back_to_latin1(self, tmp_path):
+        srt_file = tmp_path / "sample.srt"
+        srt_file.write_bytes(
+            "1\r\n00:00:01,000 --> 00:00:03,000\r\nOlá, você!\r\n".encode("latin-1")
+        )
+        cleaner = SubtitleCleaner(str(srt_file))
+        assert cleaner.load_subtitles()
+        cleaner.parse_subtitles()
+
+        assert [sub.text for sub in cleaner.subtitles] == ["Olá, você!"]
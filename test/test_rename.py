@@ -0,0 +1,32 @@
+from src.rename import rename_files
+
+
+class TestRename:
+
+    def test_rename_files_replace_mode(self, tmp_path):
+        input_dir = tmp_path / "episodes"
+        input_dir.mkdir()
+        (input_dir / "a.mkv").touch()
+        (input_dir / "b.mkv").touch()
+        names_file = tmp_path / "names.txt"
+        names_file.write_text("Pilot\r\n\r\nFinale\r\n", encoding="utf-8")
+
+        assert rename_files(input_dir, names_file, append_mode=False)
+        assert sorted(p.name for p in input_dir.iterdir()) == [
+            "Finale.mkv",
+            "Pilot.mkv",
+        ]
+
+    def test_rename_files_keeps_unusual_line_breaks_in_names(self, tmp_path):
+        input_dir = tmp_path / "episodes"
+        input_dir.mkdir()
+        (input_dir / "a.mkv").touch()
+        (input_dir / "b.mkv").touch()
+        names_file = tmp_path / "names.txt"
+        names_file.write_text("One\x0cTwo\nThree Four\n", encoding="utf-8")
+
+        assert rename_files(input_dir, names_file, append_mode=False)
+        assert sorted(p.name for p in input_dir.iterdir()) == [
+            "One\x0cTwo.mkv",
+            "Three Four.mkv",
+        ]